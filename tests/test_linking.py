@@ -0,0 +1,148 @@
+import importlib
+import os
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+interpreter = importlib.import_module('wilc-lang.interpreter')
+
+EXAMPLES = ROOT / 'examples'
+LIBS = ROOT / 'wilc-lang' / 'libs'
+
+
+def link(source_path: Path, cache=None) -> list:
+    vm = interpreter.VirtualMachine()
+    interpreter.parse_source(source_path, LIBS, vm, cache)
+    return vm.instruction_list
+
+
+def edit(path: Path, text: str) -> None:
+    previous = interpreter.get_mtime(path)
+    path.write_text(text)
+    if interpreter.get_mtime(path) == previous:
+        os.utime(path, ns=(previous, previous + 1))
+
+
+def execute(source_path: Path, cache) -> str:
+    with redirect_stdout(StringIO()) as stdout:
+        interpreter.execute_source(source_path, LIBS, cache)
+    return stdout.getvalue()
+
+
+def test_import_inside_block_jumps_past_inlined_code() -> None:
+    instruction_list = link(EXAMPLES / 'imports.wilc')
+
+    outer = instruction_list[3]
+    assert outer.metadata.file.name == 'imports.wilc'
+    assert outer.metadata.jump_address == 7
+    assert instruction_list[7].metadata.file.name == 'imports.wilc'
+    assert instruction_list[7].name == 'End'
+
+
+def test_module_imported_twice() -> None:
+    instruction_list = link(EXAMPLES / 'imports.wilc')
+
+    files = [instruction.metadata.file.name for instruction in instruction_list]
+    assert files == ['greeting.wilc'] * 3 + ['imports.wilc'] + ['greeting.wilc'] * 3 + ['imports.wilc'] * 2
+    assert [instruction.metadata.address for instruction in instruction_list] == list(range(9))
+    assert instruction_list[0].metadata.jump_address == 2
+    assert instruction_list[4].metadata.jump_address == 6
+    assert instruction_list[0].local_vars is not instruction_list[4].local_vars
+
+
+def test_link_copies_only_list_arguments() -> None:
+    with TemporaryDirectory() as directory:
+        main_path = Path(directory) / 'main.wilc'
+        main_path.write_text('Global::Let numbers [1, 2]\nPrintLine "text"\n')
+        cache = interpreter.ModuleCache(LIBS)
+        first, second = link(main_path, cache), link(main_path, cache)
+
+        assert first[0].args[0] is second[0].args[0]
+        assert first[1].args[0] is second[1].args[0]
+        assert first[0].args[1] is not second[0].args[1]
+        assert first[0].args[1].value is not second[0].args[1].value
+        assert first[0].args[1].value == second[0].args[1].value == [1, 2]
+
+
+def test_rerun_after_imported_file_is_edited() -> None:
+    with TemporaryDirectory() as directory:
+        main_path = Path(directory) / 'main.wilc'
+        module_path = Path(directory) / 'module.wilc'
+        main_path.write_text('Import "module.wilc"\nList::Push numbers 3\nList::GetSize numbers size\nPrintLine "{size}"\n')
+        module_path.write_text('Global::Let numbers [1, 2]\n')
+        cache = interpreter.ModuleCache(LIBS)
+
+        assert execute(main_path, cache) == '3\n\n'
+        main_module = cache.modules[main_path.resolve()]
+        assert execute(main_path, cache) == '3\n\n'
+        assert not cache.is_outdated()
+
+        edit(module_path, 'Global::Let numbers [1, 2, 3, 4]\n')
+        assert cache.is_outdated()
+        assert execute(main_path, cache) == '5\n\n'
+        assert cache.modules[main_path.resolve()] is main_module
+        assert not cache.is_outdated()
+
+
+def test_rerun_after_import_target_changes() -> None:
+    with TemporaryDirectory() as directory:
+        main_path = Path(directory) / 'main.wilc'
+        module_path = Path(directory) / 'stdlib.wilc'
+        main_path.write_text('Import "stdlib.wilc"\nPrintLine "main"\n')
+        cache = interpreter.ModuleCache(LIBS)
+
+        assert execute(main_path, cache) == 'main\n\n'
+        assert not cache.is_outdated()
+
+        module_path.write_text('Print "local "\n')
+        assert cache.is_outdated()
+        assert execute(main_path, cache) == 'local main\n\n'
+        assert not cache.is_outdated()
+
+        module_path.unlink()
+        assert cache.is_outdated()
+        assert execute(main_path, cache) == 'main\n\n'
+
+        edit(main_path, 'Import "stdlib.wilc"\nImport "missing.wilc"\n')
+        assert execute(main_path, cache).startswith('ERROR DURING PARSING: Import "missing.wilc" could not be resolved')
+
+
+def test_outdated_when_unresolved_import_appears() -> None:
+    with TemporaryDirectory() as directory:
+        main_path = Path(directory) / 'main.wilc'
+        module_path = Path(directory) / 'helper.wilc'
+        main_path.write_text('Import "helper.wilc"\nPrintLine "main"\n')
+        cache = interpreter.ModuleCache(LIBS)
+
+        assert execute(main_path, cache).startswith('ERROR DURING PARSING: Import "helper.wilc" could not be resolved')
+        assert not cache.is_outdated()
+
+        module_path.write_text('Print "helper "\n')
+        assert cache.is_outdated()
+        assert execute(main_path, cache) == 'helper main\n\n'
+
+
+def test_rerun_forgets_modules_no_longer_imported() -> None:
+    with TemporaryDirectory() as directory:
+        main_path = Path(directory) / 'main.wilc'
+        module_path = Path(directory) / 'module.wilc'
+        main_path.write_text('Import "module.wilc"\n')
+        module_path.write_text('PrintLine "module"\n')
+        cache = interpreter.ModuleCache(LIBS)
+
+        assert execute(main_path, cache) == 'module\n\n'
+        assert module_path.resolve() in cache.modules
+
+        main_path.write_text('PrintLine "main"\n')
+        assert execute(main_path, cache) == 'main\n\n'
+        assert module_path.resolve() not in cache.modules
+        assert module_path.resolve() not in cache.mtimes
+
+        module_path.unlink()
+        assert not cache.is_outdated()
+
@@ -1,19 +1,45 @@
 import argparse
 from pathlib import Path
+from time import sleep
 from timeit import timeit
-from .interpreter import execute_source
+from .interpreter import ModuleCache, execute_source
+
+
+WATCH_INTERVAL = 0.25
 
 
 parser = argparse.ArgumentParser(description='Executes a .wilc script')
 parser.add_argument('path', help='Path to a file that will get executed')
 parser.add_argument('-t', '--timeit', action='store_true')
+parser.add_argument('-w', '--watch', action='store_true', help='Re-run the script whenever it or its imports change')
 args = parser.parse_args()
 
 
 path = Path(args.path)
 libs_path = Path(__file__).parent / Path('libs')
+cache = ModuleCache(libs_path)
+
+
+def run() -> None:
+    exec_time = timeit(lambda: execute_source(path, libs_path, cache), number=1)
+    if args.timeit:
+        print(f'[Finished in {exec_time:.4f}s.]')
+
+
+def watch() -> None:
+    while True:
+        try:
+            run()
+        except Exception as err:
+            print(f'OTHER ERROR: {err}')
+        while not cache.is_outdated():
+            sleep(WATCH_INTERVAL)
 
 
-exec_time = timeit(lambda: execute_source(path, libs_path), number=1)
-if args.timeit:
-    print(f'[Finished in {exec_time:.4f}s.]')
+if args.watch:
+    try:
+        watch()
+    except KeyboardInterrupt:
+        pass
+else:
+    run()
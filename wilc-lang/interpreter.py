@@ -1,4 +1,7 @@
+import hashlib
 from . import instructions
+from dataclasses import dataclass, field
+from io import StringIO
 from pathlib import Path
 from .type_system import *
 from .virtual_machine import *
@@ -18,14 +21,17 @@ def get_instruction(line: str) -> tuple[str, str]:
     return instruction, line[index:]
 
 
-def resolve_import(import_path: str, source_path: Path, libs_path: Path, position: tuple[int, int]) -> Path:
-    if source_path.is_file(): source_path = source_path.parent
+def resolve_import(import_path: str, source_path: Path, libs_path: Path, position: tuple[int, int], mtimes: dict[Path, int | None] | None = None) -> Path:
+    source_dir = source_path.parent if source_path.is_file() else source_path
     path = Path(import_path)
+    import_source = source_dir / path
+    import_lib = libs_path / path
 
-    if not path.is_absolute():
-        import_source = source_path / path
-        import_lib = libs_path / path
+    if mtimes is not None:
+        for candidate in {import_source, import_lib}:
+            mtimes[candidate.resolve()] = get_mtime(candidate)
 
+    if not path.is_absolute():
         if import_lib.is_file(): path = import_lib
         if import_source.is_file(): path = import_source
 
@@ -35,10 +41,72 @@ def resolve_import(import_path: str, source_path: Path, libs_path: Path, positio
         raise UnresolvedImport(f'Import "{import_path}" could not be resolved', file=source_path, position=position)
 
 
-def parse_source(source_path: Path, libs_path: Path, vm: VirtualMachine) -> None:
-    source_file = source_path.open(encoding='utf-8')
-    blocks: list[Instruction] = list()
-    local_vars: dict[str, Object] = dict()
+def get_mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+@dataclass
+class Statement:
+    name: str
+    instruction: type[Instruction]
+    args: list[Object]
+    position: tuple[int, int]
+    block_end: int | None = None
+    import_path: str | None = None
+
+    def __repr__(self) -> str:
+        args = ' '.join(str(obj.value) for obj in self.args)
+        return f'<{self.name} {args}>'
+
+
+@dataclass
+class Module:
+    path: Path
+    digest: str
+    statements: list[Statement]
+
+
+@dataclass
+class ModuleCache:
+    libs_path: Path
+    modules: dict[Path, Module] = field(default_factory=dict, init=False)
+    mtimes: dict[Path, int | None] = field(default_factory=dict, init=False)
+
+    def get(self, source_path: Path, mtimes: dict[Path, int | None], importer: Path | None = None, position: tuple[int, int] = (0, 0)) -> Module:
+        key = source_path.resolve()
+        mtimes[key] = get_mtime(key)
+        try:
+            source = source_path.read_bytes()
+        except OSError:
+            if importer is None: raise
+            raise UnresolvedImport(f'Import "{source_path}" could not be resolved', file=importer, position=position)
+        digest = hashlib.sha256(source).hexdigest()
+
+        module = self.modules.get(key)
+        if module is None or module.digest != digest:
+            module = parse_module(source_path, source.decode('utf-8'), digest)
+            self.modules[key] = module
+        return module
+
+    def link(self, source_path: Path, vm: VirtualMachine) -> None:
+        mtimes: dict[Path, int | None] = dict()
+        try:
+            link_module(self.get(source_path, mtimes), self, vm, mtimes)
+        finally:
+            self.mtimes = mtimes
+        self.modules = {path: module for path, module in self.modules.items() if path in mtimes}
+
+    def is_outdated(self) -> bool:
+        return any(get_mtime(path) != mtime for path, mtime in self.mtimes.items())
+
+
+def parse_module(source_path: Path, source: str, digest: str) -> Module:
+    source_file = StringIO(source, newline=None)
+    statements: list[Statement] = list()
+    blocks: list[Statement] = list()
     current_line: int = -1
 
     while line := source_file.readline():
@@ -49,56 +117,75 @@ def parse_source(source_path: Path, libs_path: Path, vm: VirtualMachine) -> None
         if not instruction: continue
 
         current_char = line.find(instruction)
+        position = (current_line, current_char)
 
         if instruction in instructions.GENERIC:
-            metadata = Metadata(source_path, (current_line, current_char), len(vm.instruction_list), -1)
-            args = get_object_list(args_str, file=source_path, position=metadata.position)
-            vm.instruction_list.append(instructions.GENERIC[instruction](vm, local_vars, args, metadata))
+            args = get_object_list(args_str, file=source_path, position=position)
+            statements.append(Statement(instruction, instructions.GENERIC[instruction], args, position))
             continue
 
         if instruction in instructions.BLOCKS_START:
-            metadata = Metadata(source_path, (current_line, current_char), len(vm.instruction_list), -1)
-            args = get_object_list(args_str, file=source_path, position=metadata.position)
-            block_start = instructions.BLOCKS_START[instruction](vm, local_vars, args, metadata)
-            vm.instruction_list.append(block_start)
+            args = get_object_list(args_str, file=source_path, position=position)
+            block_start = Statement(instruction, instructions.BLOCKS_START[instruction], args, position)
+            statements.append(block_start)
             blocks.append(block_start)
             continue
 
         if instruction in instructions.BLOCKS_END:
-            metadata = Metadata(source_path, (current_line, current_char), len(vm.instruction_list), -1)
-            args = get_object_list(args_str, file=source_path, position=metadata.position)
-            vm.instruction_list.append(instructions.BLOCKS_END[instruction](vm, local_vars, args, metadata))
+            args = get_object_list(args_str, file=source_path, position=position)
+            statements.append(Statement(instruction, instructions.BLOCKS_END[instruction], args, position))
             if not blocks:
-                raise UnexpectedEnd('Unexpected End', file=source_path, position=metadata.position)
-            blocks.pop().metadata.jump_address = metadata.address
+                raise UnexpectedEnd('Unexpected End', file=source_path, position=position)
+            blocks.pop().block_end = len(statements) - 1
             continue
 
         if instruction in instructions.IMPORT:
-            offset = len(vm.instruction_list)
-            metadata = Metadata(source_path, (current_line, current_char), len(vm.instruction_list), -1)
-            args = get_object_list(args_str, file=source_path, position=metadata.position)
-            instructions.IMPORT[instruction](vm, local_vars, args, metadata).execute()
-            module_path = resolve_import(args[0].value, source_path, libs_path, metadata.position)
-            module_vm = VirtualMachine()
-            module_vm.stdout.close()
-            parse_source(module_path, libs_path, module_vm)
-            for instruction in module_vm.instruction_list:
-                instruction.vm = vm
-                instruction.metadata.address += offset
-                instruction.metadata.jump_address += offset
-                vm.instruction_list.append(instruction)
+            args = get_object_list(args_str, file=source_path, position=position)
+            if len(args) != 1 or args[0].type != Type.STRING:
+                raise UnresolvedImport(f'{instruction} expects a single string argument', file=source_path, position=position)
+            statements.append(Statement(instruction, instructions.IMPORT[instruction], args, position, import_path=args[0].value))
             continue
 
-        raise InvalidInstruction(f'Instruction "{instruction}" does not exist', file=source_path,  position=(current_line, current_char))
-    
+        raise InvalidInstruction(f'Instruction "{instruction}" does not exist', file=source_path,  position=position)
+
     if blocks:
-        raise UnclosedBlock(f'Block {blocks[-1]} was never closed', file=source_path, position=blocks[-1].metadata.position)
+        raise UnclosedBlock(f'Block {blocks[-1]} was never closed', file=source_path, position=blocks[-1].position)
+
+    return Module(source_path, digest, statements)
+
+
+def link_module(module: Module, cache: ModuleCache, vm: VirtualMachine, mtimes: dict[Path, int | None]) -> None:
+    local_vars: dict[str, Object] = dict()
+    addresses: dict[int, int] = dict()
+    block_starts: list[tuple[Instruction, int]] = list()
+
+    for index, statement in enumerate(module.statements):
+        if statement.import_path is not None:
+            module_path = resolve_import(statement.import_path, module.path, cache.libs_path, statement.position, mtimes)
+            link_module(cache.get(module_path, mtimes, module.path, statement.position), cache, vm, mtimes)
+            continue
+
+        metadata = Metadata(module.path, statement.position, len(vm.instruction_list), -1)
+        args = [Object[list](Type.LIST, list(arg.value)) if arg.type == Type.LIST else arg for arg in statement.args]
+        instruction = statement.instruction(vm, local_vars, args, metadata)
+        vm.instruction_list.append(instruction)
+        addresses[index] = metadata.address
+        if statement.block_end is not None:
+            block_starts.append((instruction, statement.block_end))
+
+    for instruction, block_end in block_starts:
+        instruction.metadata.jump_address = addresses[block_end]
+
+
+def parse_source(source_path: Path, libs_path: Path, vm: VirtualMachine, cache: ModuleCache | None = None) -> None:
+    if cache is None: cache = ModuleCache(libs_path)
+    cache.link(source_path, vm)
 
 
-def execute_source(source_path: Path, libs_path: Path) -> None:
+def execute_source(source_path: Path, libs_path: Path, cache: ModuleCache | None = None) -> None:
     vm = VirtualMachine()
     try:
-        parse_source(source_path, libs_path, vm)
+        parse_source(source_path, libs_path, vm, cache)
         while vm.is_running: vm.execute_next()
         print(vm.stdout.getvalue())
     except ParseException as err: